@@ -2,48 +2,154 @@
 # AHEAD – INTEGRATED DATA QUALITY DASHBOARD (STREAMLIT APP)
 # ============================================================
 
+import io
 import os
 from typing import Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import matplotlib.pyplot as plt
 import streamlit as st
 
-# For dynamic map visualization
+# For interactive charts and dynamic map visualization
 try:
     import plotly.express as px
     PLOTLY_AVAILABLE = True
 except ImportError:
     PLOTLY_AVAILABLE = False
-    print("Warning: plotly not available. Map features will be limited.")
+    print("Warning: plotly not available. Falling back to static charts; map features will be limited.")
 
 # ------------------------------------------------------------
 # CONFIGURATION
 # ------------------------------------------------------------
 DQ_EXCEL_PATH = "dq_review_ken_level4.xlsx"
+DQ_PARQUET_PREFIX = "dq_review_ken_level4"
 DQ_GEO_PATH = "dq_unit_with_outliers.parquet"
 
+# Geo file columns used by the map page (others are never read from disk)
+GEO_COLUMNS = [
+    "unit_code", "unit_name", "unit_level", "pct_reported",
+    "lat", "lon", "n_outliers_unit", "bubble_size_default",
+]
+
+# Above this many units the map only draws units with outliers (largest first)
+MAP_MAX_POINTS = 2000
+
+DQ_TABLES = [
+    "completeness_indicator",
+    "completeness_unit",
+    "duplicates",
+    "outliers",
+    "derived_indicators",
+]
+
+# Repeated string keys stored as category so groupby/isin work on integer codes
+CATEGORY_COLS = ["indicator_type", "indicator_code", "unit_code"]
+
 # ------------------------------------------------------------
 # DATA LOADING
 # ------------------------------------------------------------
+def parquet_table_paths(parquet_prefix: str) -> list[str]:
+    return [f"{parquet_prefix}_{table}.parquet" for table in DQ_TABLES]
+
+
+def decode_dictionary_columns(df: pd.DataFrame) -> pd.DataFrame:
+    # Categorical columns written by the pipeline come back from the pyarrow
+    # backend as dictionary<...>[pyarrow], which cannot be cast with astype when
+    # it holds nulls (e.g. unmapped indicator_type); decode them to pandas category
+    dict_cols = [
+        col for col in df.columns
+        if isinstance(df[col].dtype, pd.ArrowDtype)
+        and pa.types.is_dictionary(df[col].dtype.pyarrow_dtype)
+    ]
+    if not dict_cols:
+        return df
+    return df.assign(**{col: pd.Categorical(df[col].to_numpy()) for col in dict_cols})
+
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    df = decode_dictionary_columns(df)
+    # float32 is ample for display and mean/median aggregation and halves memory
+    dtypes = {
+        col: "float[pyarrow]"
+        for col in df.columns
+        if pd.api.types.is_float_dtype(df[col])
+    }
+    dtypes.update({col: "category" for col in CATEGORY_COLS if col in df.columns})
+    return df.astype(dtypes)
+
+
 @st.cache_data
-def load_dq_data(excel_path: str) -> Tuple[
+def load_dq_data(parquet_prefix: str) -> Tuple[
     pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame
 ]:
-    dq_indicator = pd.read_excel(excel_path, sheet_name="completeness_indicator")
-    dq_unit = pd.read_excel(excel_path, sheet_name="completeness_unit")
-    dq_duplicates = pd.read_excel(excel_path, sheet_name="duplicates")
-    dq_outliers = pd.read_excel(excel_path, sheet_name="outliers")
-    df_derived = pd.read_excel(excel_path, sheet_name="derived_indicators")
+    dq_indicator, dq_unit, dq_duplicates, dq_outliers, df_derived = (
+        optimize_dtypes(pd.read_parquet(path, dtype_backend="pyarrow"))
+        for path in parquet_table_paths(parquet_prefix)
+    )
     return dq_indicator, dq_unit, dq_duplicates, dq_outliers, df_derived
 
 
+def _parse_full_table(xls: pd.ExcelFile, excel_path: str, table: str) -> pd.DataFrame:
+    # Newer workbooks only summarise duplicates/outliers; the full table sits
+    # next to the workbook as parquet
+    if table in xls.sheet_names:
+        return xls.parse(table, dtype_backend="pyarrow")
+    return pd.read_parquet(excel_path.replace(".xlsx", f"_{table}.parquet"), dtype_backend="pyarrow")
+
+
+@st.cache_data
+def load_dq_excel(excel_path: str) -> Tuple[
+    pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame
+]:
+    # Fallback for workbooks produced before the pipeline exported parquet tables.
+    # Open the workbook once and parse each sheet with the Rust-based calamine reader
+    with pd.ExcelFile(excel_path, engine="calamine") as xls:
+        dq_indicator = xls.parse("completeness_indicator", dtype_backend="pyarrow")
+        dq_unit = xls.parse("completeness_unit", dtype_backend="pyarrow")
+        dq_duplicates = _parse_full_table(xls, excel_path, "duplicates")
+        dq_outliers = _parse_full_table(xls, excel_path, "outliers")
+        df_derived = xls.parse("derived_indicators", dtype_backend="pyarrow")
+    return tuple(
+        optimize_dtypes(df)
+        for df in (dq_indicator, dq_unit, dq_duplicates, dq_outliers, df_derived)
+    )
+
+
+@st.cache_data
+def load_unit_outlier_pivot(parquet_prefix: str) -> pd.DataFrame | None:
+    pivot_path = f"{parquet_prefix}_unit_outlier_pivot.parquet"
+    if not os.path.exists(pivot_path):
+        return None
+    pivot = decode_dictionary_columns(pd.read_parquet(pivot_path, dtype_backend="pyarrow"))
+    return pivot.set_index("unit_code")
+
+
+@st.cache_data
+def build_unit_outlier_pivot(dq_outliers: pd.DataFrame) -> pd.DataFrame:
+    # Fallback when the pipeline output predates the precomputed pivot
+    pivot = (
+        dq_outliers.groupby(["unit_code", "indicator_type"], observed=True)
+        .size()
+        .unstack("indicator_type", fill_value=0)
+    )
+    pivot.columns.name = None
+    return pivot
+
+
 @st.cache_data
 def load_geo_data(geo_path: str) -> pd.DataFrame | None:
     if not os.path.exists(geo_path):
         return None
-    return pd.read_parquet(geo_path)
+    # Project columns in the parquet reader; older files may lack some of them
+    available = set(pq.read_schema(geo_path).names)
+    return decode_dictionary_columns(pd.read_parquet(
+        geo_path,
+        columns=[col for col in GEO_COLUMNS if col in available],
+        dtype_backend="pyarrow",
+    ))
 
 # ------------------------------------------------------------
 # GLOBAL KPIs
@@ -92,11 +198,10 @@ def indicators_page(dq_indicator: pd.DataFrame):
             ["pct_outliers", "pct_missing", "pct_negative"],
         )
 
-    df = dq_indicator[dq_indicator["indicator_type"].isin(selected)].copy()
-
     agg_cols = ["pct_missing", "pct_negative", "pct_duplicates", "pct_outliers"]
     df_agg = (
-        df.groupby("indicator_type")[agg_cols]
+        dq_indicator.loc[dq_indicator["indicator_type"].isin(selected)]
+        .groupby("indicator_type", observed=True)[agg_cols]
         .mean(numeric_only=True)
         .reset_index()
     )
@@ -104,40 +209,64 @@ def indicators_page(dq_indicator: pd.DataFrame):
     top_n = st.slider("Number of indicators to show", 5, 50, 20)
     df_top = df_agg.sort_values(metric, ascending=False).head(top_n).iloc[::-1]
 
-    fig, ax = plt.subplots(figsize=(8, max(4, 0.3 * len(df_top))))
-    ax.barh(df_top["indicator_type"], df_top[metric])
-    ax.set_xlabel(f"{metric} (%)")
-    ax.set_title("Worst-performing indicators")
-    st.pyplot(fig)
+    if PLOTLY_AVAILABLE:
+        fig = px.bar(
+            df_top,
+            x=metric,
+            y="indicator_type",
+            orientation="h",
+            labels={metric: f"{metric} (%)", "indicator_type": ""},
+            title="Worst-performing indicators",
+        )
+        fig.update_layout(height=max(400, 25 * len(df_top)))
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        fig, ax = plt.subplots(figsize=(8, max(4, 0.3 * len(df_top))))
+        ax.barh(df_top["indicator_type"], df_top[metric])
+        ax.set_xlabel(f"{metric} (%)")
+        ax.set_title("Worst-performing indicators")
+        st.pyplot(fig)
+        plt.close(fig)
 
     st.dataframe(df_agg.sort_values(metric, ascending=False))
 
 
-def units_page(dq_unit: pd.DataFrame, dq_outliers: pd.DataFrame):
+def units_page(dq_unit: pd.DataFrame, unit_outlier_pivot: pd.DataFrame):
     st.subheader("Unit-level Reporting Completeness")
 
     levels = sorted(dq_unit["unit_level"].dropna().unique())
     level = st.selectbox("Unit level", levels)
 
-    df = dq_unit[dq_unit["unit_level"] == level].copy()
-
-    outliers = (
-        dq_outliers.groupby("unit_code")["value_clean"]
-        .size()
-        .rename("n_outliers_unit")
+    # merge() returns a new frame, so the filtered slice needs no copy
+    outliers = unit_outlier_pivot.sum(axis=1).rename("n_outliers_unit")
+    df = dq_unit.loc[dq_unit["unit_level"] == level].merge(
+        outliers, left_on="unit_code", right_index=True, how="left"
     )
-    df = df.merge(outliers, on="unit_code", how="left")
     df["n_outliers_unit"] = df["n_outliers_unit"].fillna(0).astype(int)
     df["pct_reported_pct"] = df["pct_reported"] * 100
 
     max_report = st.slider("Show units with completeness ≤ (%)", 0, 100, 80)
     df = df[df["pct_reported_pct"] <= max_report]
 
-    fig, ax = plt.subplots(figsize=(8, max(4, 0.3 * len(df.head(30)))))
-    ax.barh(df.head(30)["unit_name"], df.head(30)["pct_reported_pct"])
-    ax.set_xlabel("Reporting completeness (%)")
-    ax.set_title("Lowest reporting units")
-    st.pyplot(fig)
+    df_top = df.head(30)
+    if PLOTLY_AVAILABLE:
+        fig = px.bar(
+            df_top,
+            x="pct_reported_pct",
+            y="unit_name",
+            orientation="h",
+            labels={"pct_reported_pct": "Reporting completeness (%)", "unit_name": ""},
+            title="Lowest reporting units",
+        )
+        fig.update_layout(height=max(400, 25 * len(df_top)))
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        fig, ax = plt.subplots(figsize=(8, max(4, 0.3 * len(df_top))))
+        ax.barh(df_top["unit_name"], df_top["pct_reported_pct"])
+        ax.set_xlabel("Reporting completeness (%)")
+        ax.set_title("Lowest reporting units")
+        st.pyplot(fig)
+        plt.close(fig)
 
     st.dataframe(df.sort_values("pct_reported_pct"))
 
@@ -147,23 +276,46 @@ def heatmap_page(dq_indicator: pd.DataFrame):
 
     metrics = ["pct_missing", "pct_negative", "pct_duplicates", "pct_outliers"]
     df = (
-        dq_indicator.groupby("indicator_type")[metrics]
+        dq_indicator.groupby("indicator_type", observed=True)[metrics]
         .mean(numeric_only=True)
         .reset_index()
         .sort_values("pct_outliers", ascending=False)
     )
 
-    fig, ax = plt.subplots(figsize=(8, max(4, 0.3 * len(df))))
-    im = ax.imshow(df[metrics], aspect="auto")
-    ax.set_yticks(range(len(df)))
-    ax.set_yticklabels(df["indicator_type"])
-    ax.set_xticks(range(len(metrics)))
-    ax.set_xticklabels(metrics, rotation=45)
-    fig.colorbar(im, ax=ax)
-    st.pyplot(fig)
+    values = df[metrics].to_numpy(dtype="float64", na_value=np.nan)
+    if PLOTLY_AVAILABLE:
+        fig = px.imshow(
+            values,
+            x=metrics,
+            y=df["indicator_type"],
+            aspect="auto",
+            color_continuous_scale="Viridis",
+        )
+        fig.update_layout(height=max(400, 25 * len(df)))
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        fig, ax = plt.subplots(figsize=(8, max(4, 0.3 * len(df))))
+        im = ax.imshow(values, aspect="auto")
+        ax.set_yticks(range(len(df)))
+        ax.set_yticklabels(df["indicator_type"])
+        ax.set_xticks(range(len(metrics)))
+        ax.set_xticklabels(metrics, rotation=45)
+        fig.colorbar(im, ax=ax)
+        st.pyplot(fig)
+        plt.close(fig)
+
+
+@st.cache_data
+def _filtered_counts(unit_outlier_pivot: pd.DataFrame, selected: Tuple[str, ...]) -> pd.Series:
+    # Column sums over the precomputed unit × indicator_type pivot
+    if selected:
+        counts = unit_outlier_pivot[list(selected)].sum(axis=1)
+    else:
+        counts = unit_outlier_pivot.sum(axis=1)
+    return counts.rename("n_outliers_filt")
 
 
-def map_page(dq_unit_geo: pd.DataFrame | None, dq_outliers: pd.DataFrame):
+def map_page(dq_unit_geo: pd.DataFrame | None, unit_outlier_pivot: pd.DataFrame):
     """
     FIXED VERSION: Map now updates dynamically with indicator filters
     """
@@ -173,12 +325,8 @@ def map_page(dq_unit_geo: pd.DataFrame | None, dq_outliers: pd.DataFrame):
         st.info("Geo file not found. Run pipeline Section 9 to generate geographic data.")
         return
 
-    # Get base data
-    df = dq_unit_geo.copy()
-    df["pct_reported_pct"] = df["pct_reported"] * 100
-
     # Indicator filter
-    indicators = sorted(dq_outliers["indicator_type"].dropna().unique())
+    indicators = sorted(unit_outlier_pivot.columns)
     
     st.markdown("### Filter Options")
     selected = st.multiselect(
@@ -189,30 +337,39 @@ def map_page(dq_unit_geo: pd.DataFrame | None, dq_outliers: pd.DataFrame):
 
     # CRITICAL FIX: Filter outliers BEFORE counting
     if selected:
-        out = dq_outliers[dq_outliers["indicator_type"].isin(selected)].copy()
         filter_status = f"Showing outliers for: {', '.join(selected)}"
     else:
-        out = dq_outliers.copy()
         filter_status = "Showing all outliers"
     
     st.info(f"📍 {filter_status}")
 
-    # Count filtered outliers per unit
-    counts = out.groupby("unit_code").size().reset_index(name="n_outliers_filt")
-    
-    # Merge with geo data
-    df = df.merge(counts, on="unit_code", how="left")
-    df["n_outliers_filt"] = df["n_outliers_filt"].fillna(0).astype(int)
+    if not selected and "bubble_size_default" in dq_unit_geo.columns:
+        # Unfiltered counts and bubble sizes are precomputed by the pipeline
+        df = dq_unit_geo.assign(
+            n_outliers_filt=dq_unit_geo["n_outliers_unit"],
+            bubble_size=dq_unit_geo["bubble_size_default"],
+        )
+    else:
+        # Count filtered outliers per unit (cached per selection)
+        counts = _filtered_counts(unit_outlier_pivot, tuple(sorted(selected)))
+        
+        # Merge with geo data (returns a new frame, so cached data is never mutated)
+        df = dq_unit_geo.merge(counts, left_on="unit_code", right_index=True, how="left")
+        df["n_outliers_filt"] = df["n_outliers_filt"].fillna(0).astype(int)
 
-    # Create bubble size (square root scaling for better visualization)
-    df["bubble_size"] = np.sqrt(df["n_outliers_filt"] + 1) * 5
-    
-    # Add hover text
-    df["hover_text"] = (
-        df["unit_name"] + 
-        "<br>Completeness: " + df["pct_reported_pct"].round(1).astype(str) + "%" +
-        "<br>Outliers: " + df["n_outliers_filt"].astype(str)
-    )
+        # Create bubble size (square root scaling for better visualization)
+        df["bubble_size"] = np.sqrt(df["n_outliers_filt"] + 1) * 5
+
+    df["pct_reported_pct"] = df["pct_reported"] * 100
+
+    # Limit markers for large unit counts to keep pan/zoom responsive
+    df_plot = df
+    if len(df) > MAP_MAX_POINTS:
+        df_plot = df[df["n_outliers_filt"] > 0].nlargest(MAP_MAX_POINTS, "n_outliers_filt")
+        st.caption(
+            f"Map limited to {len(df_plot):,} of {len(df):,} units "
+            f"(units with the most outliers); the table below lists all units."
+        )
 
     # ============================================================
     # PLOTLY INTERACTIVE MAP (RECOMMENDED)
@@ -222,7 +379,7 @@ def map_page(dq_unit_geo: pd.DataFrame | None, dq_outliers: pd.DataFrame):
         
         # Create plotly scatter map
         fig = px.scatter_mapbox(
-            df,
+            df_plot,
             lat="lat",
             lon="lon",
             size="bubble_size",
@@ -235,6 +392,10 @@ def map_page(dq_unit_geo: pd.DataFrame | None, dq_outliers: pd.DataFrame):
                 "lat": False,
                 "lon": False
             },
+            labels={
+                "pct_reported_pct": "Completeness (%)",
+                "n_outliers_filt": "Outliers"
+            },
             color_continuous_scale="Reds",
             size_max=30,
             zoom=5.5,
@@ -257,8 +418,9 @@ def map_page(dq_unit_geo: pd.DataFrame | None, dq_outliers: pd.DataFrame):
         st.warning("Install plotly for interactive map: pip install plotly")
         
         # Prepare data for st.map
-        df_map = df[["lat", "lon", "bubble_size"]].copy()
-        df_map = df_map.rename(columns={"lat": "latitude", "lon": "longitude"})
+        df_map = df_plot[["lat", "lon", "bubble_size"]].rename(
+            columns={"lat": "latitude", "lon": "longitude"}
+        )
         
         # Use st.map (note: this is less dynamic but works without plotly)
         st.map(df_map, size="bubble_size")
@@ -278,8 +440,7 @@ def map_page(dq_unit_geo: pd.DataFrame | None, dq_outliers: pd.DataFrame):
         st.metric("Total Outliers", int(df["n_outliers_filt"].sum()))
     
     # Show sortable table
-    df_display = df[["unit_name", "unit_level", "pct_reported_pct", "n_outliers_filt"]].copy()
-    df_display = df_display.rename(columns={
+    df_display = df[["unit_name", "unit_level", "pct_reported_pct", "n_outliers_filt"]].rename(columns={
         "unit_name": "Unit",
         "unit_level": "Level",
         "pct_reported_pct": "Completeness (%)",
@@ -293,6 +454,23 @@ def map_page(dq_unit_geo: pd.DataFrame | None, dq_outliers: pd.DataFrame):
     )
 
 
+@st.cache_data
+def _sorted_outliers(
+    dq_outliers: pd.DataFrame, min_zscore: float, indicators: Tuple[str, ...]
+) -> pd.DataFrame:
+    df = dq_outliers
+    if "abs_zscore" not in df.columns:  # Outputs from older pipeline runs
+        df = df.assign(abs_zscore=df["zscore"].abs())
+    
+    if indicators:
+        df = df[df["indicator_type"].isin(indicators)]
+    
+    df = df[df["abs_zscore"] >= min_zscore]
+    
+    # Sort by absolute z-score
+    return df.sort_values("abs_zscore", ascending=False)
+
+
 def outliers_page(dq_outliers: pd.DataFrame):
     st.subheader("Outlier Records")
     
@@ -312,15 +490,8 @@ def outliers_page(dq_outliers: pd.DataFrame):
             0.0, 10.0, 0.0, 0.5
         )
     
-    # Apply filters
-    df = dq_outliers.copy()
-    if indicator_filter:
-        df = df[df["indicator_type"].isin(indicator_filter)]
-    
-    df = df[df["zscore"].abs() >= min_zscore]
-    
-    # Sort by absolute z-score
-    df = df.sort_values("zscore", key=lambda s: s.abs(), ascending=False)
+    # Apply filters and sort (cached per filter selection)
+    df = _sorted_outliers(dq_outliers, min_zscore, tuple(sorted(indicator_filter)))
     
     st.info(f"Showing {len(df):,} outliers (from {len(dq_outliers):,} total)")
     
@@ -334,7 +505,10 @@ def outliers_page(dq_outliers: pd.DataFrame):
 def derived_page(df_derived: pd.DataFrame):
     st.subheader("Derived Percentage Indicators")
 
-    pct_cols = [c for c in df_derived.columns if c.startswith("pct_")]
+    pct_cols = [
+        c for c in df_derived.columns
+        if c.startswith("pct_") and not c.endswith("_ma3")
+    ]
     
     if not pct_cols:
         st.warning("No derived indicators found in the dataset.")
@@ -347,39 +521,66 @@ def derived_page(df_derived: pd.DataFrame):
 
     mode = st.radio("View mode", ["Aggregate (median)", "Single unit"], horizontal=True)
 
-    df = df_derived[df_derived["unit_level"] == level].copy()
-    df["date"] = pd.to_datetime(df["date"])
-    df = df.sort_values("date")
+    # Dates are parsed and ordered once by the pipeline
+    df = df_derived[df_derived["unit_level"] == level]
 
+    # Apply 3-month moving average
+    ma_col = f"{indicator}_ma3"
     if mode == "Aggregate (median)":
         df_plot = df.groupby("date", as_index=False)[indicator].median()
+        df_plot[indicator] = df_plot[indicator].rolling(3, min_periods=1).mean()
         title_suffix = "(National Median)"
     else:
         units = sorted(df["unit_name"].dropna().unique())
         unit = st.selectbox("Unit", units)
-        df_plot = df[df["unit_name"] == unit][["date", indicator]]
+        if ma_col in df.columns:
+            # Precomputed per unit by the pipeline
+            df_plot = df.loc[df["unit_name"] == unit, ["date", ma_col]].rename(
+                columns={ma_col: indicator}
+            )
+        else:  # Outputs from older pipeline runs
+            df_plot = df.loc[df["unit_name"] == unit, ["date", indicator]]
+            df_plot[indicator] = df_plot[indicator].rolling(3, min_periods=1).mean()
         title_suffix = f"({unit})"
-
-    # Apply 3-month moving average
-    df_plot[indicator] = df_plot[indicator].rolling(3, min_periods=1).mean()
     
     # Convert to percentage (0-100) for display
     df_plot[indicator] = df_plot[indicator] * 100
 
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(df_plot["date"], df_plot[indicator], linewidth=2, marker='o', markersize=3)
-    ax.set_ylim(0, 100)  # Changed from (0, 1) to (0, 100)
-    ax.set_ylabel("Percentage (%)")  # Changed from "Proportion (0–1)"
-    ax.set_xlabel("Date")
-    ax.set_title(f"{indicator} {title_suffix}")
-    ax.grid(True, alpha=0.3)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig)
+    if PLOTLY_AVAILABLE:
+        fig = px.line(
+            df_plot,
+            x="date",
+            y=indicator,
+            markers=True,
+            labels={indicator: "Percentage (%)", "date": "Date"},
+            title=f"{indicator} {title_suffix}",
+        )
+        fig.update_yaxes(range=[0, 100])
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        fig, ax = plt.subplots(figsize=(10, 5))
+        ax.plot(df_plot["date"], df_plot[indicator], linewidth=2, marker='o', markersize=3)
+        ax.set_ylim(0, 100)  # Changed from (0, 1) to (0, 100)
+        ax.set_ylabel("Percentage (%)")  # Changed from "Proportion (0–1)"
+        ax.set_xlabel("Date")
+        ax.set_title(f"{indicator} {title_suffix}")
+        ax.grid(True, alpha=0.3)
+        plt.xticks(rotation=45)
+        plt.tight_layout()
+        st.pyplot(fig)
+        plt.close(fig)
 
     st.dataframe(df_plot, use_container_width=True)
 
 
+@st.cache_data
+def _csv_bytes(df: pd.DataFrame) -> bytes:
+    # Encoded once per table and served from cache on later reruns
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, encoding="utf-8", chunksize=100_000)
+    return buf.getvalue()
+
+
 def export_page(dq_indicator, dq_unit, dq_outliers, df_derived):
     st.subheader("Export Data Quality Tables")
     
@@ -387,21 +588,18 @@ def export_page(dq_indicator, dq_unit, dq_outliers, df_derived):
     Download individual DQ tables as CSV files for further analysis.
     """)
     
-    def to_csv(df):
-        return df.to_csv(index=False).encode("utf-8")
-
     col1, col2 = st.columns(2)
     
     with col1:
         st.download_button(
             "📊 Download Indicator DQ", 
-            to_csv(dq_indicator), 
+            _csv_bytes(dq_indicator), 
             "dq_indicator.csv",
             help="Indicator-level completeness and quality metrics"
         )
         st.download_button(
             "📍 Download Unit DQ", 
-            to_csv(dq_unit), 
+            _csv_bytes(dq_unit), 
             "dq_unit.csv",
             help="Unit-level reporting completeness"
         )
@@ -409,13 +607,13 @@ def export_page(dq_indicator, dq_unit, dq_outliers, df_derived):
     with col2:
         st.download_button(
             "⚠️ Download Outliers", 
-            to_csv(dq_outliers), 
+            _csv_bytes(dq_outliers), 
             "dq_outliers.csv",
             help="Flagged outlier records with z-scores"
         )
         st.download_button(
             "📈 Download Derived Indicators", 
-            to_csv(df_derived), 
+            _csv_bytes(df_derived), 
             "derived_indicators.csv",
             help="Computed percentage indicators"
         )
@@ -427,15 +625,23 @@ def main():
     st.set_page_config("AHEAD Data Quality Dashboard", layout="wide")
     st.title("AHEAD – Integrated Data Quality Dashboard")
 
-    # Check for required files
-    if not os.path.exists(DQ_EXCEL_PATH):
-        st.error(f"❌ Required file not found: {DQ_EXCEL_PATH}")
+    # Check for required files (parquet tables preferred, Excel workbook as fallback)
+    use_parquet = all(os.path.exists(p) for p in parquet_table_paths(DQ_PARQUET_PREFIX))
+    if not use_parquet and not os.path.exists(DQ_EXCEL_PATH):
+        st.error(f"❌ Required files not found: {DQ_PARQUET_PREFIX}_*.parquet or {DQ_EXCEL_PATH}")
         st.info("Please run the data quality pipeline first to generate required files.")
         st.stop()
 
     # Load data
     try:
-        dq_indicator, dq_unit, dq_duplicates, dq_outliers, df_derived = load_dq_data(DQ_EXCEL_PATH)
+        if use_parquet:
+            dq_indicator, dq_unit, dq_duplicates, dq_outliers, df_derived = load_dq_data(DQ_PARQUET_PREFIX)
+            unit_outlier_pivot = load_unit_outlier_pivot(DQ_PARQUET_PREFIX)
+        else:
+            dq_indicator, dq_unit, dq_duplicates, dq_outliers, df_derived = load_dq_excel(DQ_EXCEL_PATH)
+            unit_outlier_pivot = None
+        if unit_outlier_pivot is None:
+            unit_outlier_pivot = build_unit_outlier_pivot(dq_outliers)
         dq_unit_geo = load_geo_data(DQ_GEO_PATH)
     except Exception as e:
         st.error(f"Error loading data: {e}")
@@ -498,11 +704,11 @@ def main():
     elif tab == "📊 Indicators":
         indicators_page(dq_indicator)
     elif tab == "🏥 Units":
-        units_page(dq_unit, dq_outliers)
+        units_page(dq_unit, unit_outlier_pivot)
     elif tab == "🔥 DQ Heatmap":
         heatmap_page(dq_indicator)
     elif tab == "🗺️ Map":
-        map_page(dq_unit_geo, dq_outliers)
+        map_page(dq_unit_geo, unit_outlier_pivot)
     elif tab == "⚠️ Outliers":
         outliers_page(dq_outliers)
     elif tab == "📈 Derived Indicators":
@@ -9,24 +9,44 @@ UNICEF AHEAD Project
 Last Updated: December 2024
 """
 
+import hashlib
+import logging
 import os
 import sys
+import time
+from logging.handlers import MemoryHandler
 from pathlib import Path
 from typing import Dict, List, Tuple
 
 import numpy as np
 import pandas as pd
-import geopandas as gpd
+import pyarrow as pa
+import shapely
+import xlsxwriter
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 
+# Progress messages go through this logger; main() attaches a buffered stdout handler
+logger = logging.getLogger("dq")
+
 # Try to import ahead_etl package
 try:
     import ahead_etl as ah
 except ImportError:
-    print("WARNING: ahead_etl package not found. Some functionality may be limited.")
+    logger.warning("WARNING: ahead_etl package not found. Some functionality may be limited.")
     ah = None
 
+# Optional: numba JIT for per-group statistics (falls back to pandas groupby)
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# Repeated string keys stored as categoricals after loading, so groupby
+# and merge hash integer codes instead of Python strings
+CATEGORY_COLS = ["country_code", "unit_code", "unit_name", "indicator_type"]
+
 
 # ============================================================
 # CONFIGURATION
@@ -49,10 +69,50 @@ class PipelineConfig:
         self.MAP_PATH = Path("Data_id_12_10_25.csv")
         self.DQ_EXCEL_PATH = f"dq_review_{self.COUNTRY_CODE.lower()}_level{self.UNIT_LEVEL}.xlsx"
         self.DQ_GEO_PATH = "dq_unit_with_outliers.parquet"
+        self.DQ_PARQUET_PREFIX = f"dq_review_{self.COUNTRY_CODE.lower()}_level{self.UNIT_LEVEL}"
+        
+        # Unit geometries are near-static; reuse cached centroids up to this age
+        # (see geo_cache_path for what the cache file is keyed on)
+        self.GEO_CACHE_MAX_AGE_DAYS = 30
+        
+        # Compute centroids inside the database (requires PostGIS) instead of
+        # fetching WKT and parsing it with shapely
+        self.CENTROIDS_IN_DB = False
         
         # IQR multiplier for outlier detection
         self.IQR_MULTIPLIER = 1.5
         
+        # Rows fetched per round trip when streaming observations from the database
+        self.SQL_CHUNKSIZE = 200_000
+        
+        # Step snapshots for development reruns: reuse the loaded and checked
+        # tables from CACHE_DIR while the settings below are unchanged.
+        # FORCE_REFRESH recomputes every step (and the centroid cache)
+        self.USE_STEP_CACHE = False
+        self.FORCE_REFRESH = False
+        self.CACHE_DIR = Path(".cache")
+        
+    @staticmethod
+    def _settings_hash(*settings) -> str:
+        """Short stable hash of the settings a cached file depends on"""
+        return hashlib.sha256(repr(settings).encode()).hexdigest()[:12]
+    
+    def step_cache_path(self, step: str) -> Path:
+        """Snapshot path for a pipeline step, keyed on the settings that shape its output"""
+        map_mtime = self.MAP_PATH.stat().st_mtime if self.MAP_PATH.exists() else None
+        config_hash = self._settings_hash(
+            self.COUNTRY_CODE, self.UNIT_LEVEL, self.DATE_MIN, self.DATE_MAX,
+            self.IQR_MULTIPLIER, os.environ.get("DB_CONN"), map_mtime
+        )
+        return self.CACHE_DIR / f"{step}_{config_hash}.parquet"
+    
+    def geo_cache_path(self) -> Path:
+        """Centroid cache path, keyed on the database and how centroids are computed"""
+        config_hash = self._settings_hash(os.environ.get("DB_CONN"), self.CENTROIDS_IN_DB)
+        return Path(
+            f"unit_centroids_{self.COUNTRY_CODE.lower()}_level{self.UNIT_LEVEL}_{config_hash}.parquet"
+        )
+    
     def validate(self):
         """Validate configuration and file existence"""
         if not self.MAP_PATH.exists():
@@ -61,7 +121,7 @@ class PipelineConfig:
         if "DB_CONN" not in os.environ:
             raise ValueError("DB_CONN not found in environment variables. Check .env file.")
         
-        print("✓ Configuration validated successfully")
+        logger.info("✓ Configuration validated successfully")
 
 
 # ============================================================
@@ -71,20 +131,20 @@ class PipelineConfig:
 def load_environment():
     """Load environment variables from .env file"""
     load_dotenv()
-    print("✓ Environment variables loaded")
+    logger.info("✓ Environment variables loaded")
 
 
 def create_db_engine():
     """Create SQLAlchemy database engine"""
     db_conn = os.environ["DB_CONN"]
     engine = create_engine(db_conn)
-    print(f"✓ Database engine created")
+    logger.info(f"✓ Database engine created")
     return engine
 
 
 def load_indicator_mapping(map_path: Path) -> pd.DataFrame:
     """Load and standardize indicator mapping CSV"""
-    print(f"\nLoading indicator mapping from: {map_path}")
+    logger.info(f"\nLoading indicator mapping from: {map_path}")
     
     # Read CSV
     df_map = pd.read_csv(map_path)
@@ -99,15 +159,16 @@ def load_indicator_mapping(map_path: Path) -> pd.DataFrame:
     required_cols = ["indicator_code", "indicator_name", "indicator_type"]
     df_map = df_map[required_cols].copy()
     
-    print(f"✓ Loaded {len(df_map)} indicator mappings")
-    print(f"  Sample: {df_map.head(3)['indicator_type'].tolist()}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"✓ Loaded {len(df_map)} indicator mappings")
+        logger.info(f"  Sample: {df_map.head(3)['indicator_type'].tolist()}")
     
     return df_map
 
 
 def load_raw_data(engine, config: PipelineConfig, df_map: pd.DataFrame) -> pd.DataFrame:
     """Load raw data from AHEAD database"""
-    print(f"\nLoading data for {config.COUNTRY_CODE}, level {config.UNIT_LEVEL}...")
+    logger.info(f"\nLoading data for {config.COUNTRY_CODE}, level {config.UNIT_LEVEL}...")
     
     # Build SQL query
     query = """
@@ -140,14 +201,25 @@ def load_raw_data(engine, config: PipelineConfig, df_map: pd.DataFrame) -> pd.Da
         query += " AND date <= %(date_max)s"
         params["date_max"] = config.DATE_MAX
     
-    # Execute query
-    df_raw = pd.read_sql(query, con=engine, params=params)
+    # Execute query, streaming rows through a server-side cursor in chunks
+    # (dtype hints avoid object columns, e.g. Decimal values from NUMERIC;
+    # dates are parsed once here so downstream outputs keep datetime64)
+    with engine.connect().execution_options(stream_results=True) as conn:
+        chunks = pd.read_sql(
+            query,
+            con=conn,
+            params=params,
+            chunksize=config.SQL_CHUNKSIZE,
+            dtype={"value": "float64", "unit_level": "int16"},
+            parse_dates={"date": {"format": "ISO8601"}}
+        )
+        df_raw = pd.concat(chunks, ignore_index=True)
     
     # Rename 'value' to 'value_clean' to match pipeline expectations
     if 'value' in df_raw.columns:
         df_raw = df_raw.rename(columns={'value': 'value_clean'})
     
-    print(f"✓ Loaded {len(df_raw):,} raw observations")
+    logger.info(f"✓ Loaded {len(df_raw):,} raw observations")
     
     # Join with indicator mapping
     df_raw = df_raw.merge(
@@ -159,7 +231,9 @@ def load_raw_data(engine, config: PipelineConfig, df_map: pd.DataFrame) -> pd.Da
     # Report unmapped indicators
     n_unmapped = df_raw["indicator_type"].isna().sum()
     if n_unmapped > 0:
-        print(f"⚠ Warning: {n_unmapped:,} observations without indicator_type mapping")
+        logger.warning(f"⚠ Warning: {n_unmapped:,} observations without indicator_type mapping")
+    
+    df_raw = df_raw.astype({col: "category" for col in CATEGORY_COLS})
     
     return df_raw
 
@@ -168,19 +242,17 @@ def load_raw_data(engine, config: PipelineConfig, df_map: pd.DataFrame) -> pd.Da
 # DATA QUALITY CHECKS
 # ============================================================
 
-def flag_missing_values(df: pd.DataFrame) -> pd.DataFrame:
-    """Flag missing value_clean as True/False"""
-    df = df.copy()
-    df["flag_missing"] = df["value_clean"].isna()
-    return df
-
-
-def flag_negative_values(df: pd.DataFrame) -> pd.DataFrame:
-    """Flag and replace negative values with NaN"""
-    df = df.copy()
-    df["flag_negative"] = (df["value_clean"] < 0) & df["value_clean"].notna()
-    df.loc[df["flag_negative"], "value_clean"] = np.nan
-    return df
+def flag_missing_and_negative(df: pd.DataFrame) -> pd.DataFrame:
+    """Flag missing and negative value_clean, replacing negatives with NaN"""
+    # One read of the value array for both flags and the replacement
+    values = df["value_clean"].to_numpy(dtype=np.float64, na_value=np.nan)
+    is_negative = values < 0  # NaN compares as False
+    
+    return df.assign(
+        value_clean=np.where(is_negative, np.nan, values),
+        flag_missing=np.isnan(values),
+        flag_negative=is_negative
+    )
 
 
 def remove_duplicates(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
@@ -197,66 +269,113 @@ def remove_duplicates(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     # Remove duplicates
     df_clean = df[~df["flag_duplicate"]].copy()
     
-    print(f"✓ Removed {len(df_duplicates):,} duplicate records")
+    logger.info(f"✓ Removed {len(df_duplicates):,} duplicate records")
     
     return df_clean, df_duplicates
 
 
-def flag_outliers_iqr(df: pd.DataFrame, iqr_multiplier: float = 1.5) -> pd.DataFrame:
-    """Flag outliers using IQR method within each indicator_type"""
-    df = df.copy()
-    df["flag_outlier"] = False
-    df["outlier_threshold_lo"] = np.nan
-    df["outlier_threshold_hi"] = np.nan
-    
-    # Group by indicator_type
-    for indicator_type, group in df.groupby("indicator_type"):
-        if group["value_clean"].notna().sum() < 5:
-            continue  # Skip if too few values
-        
-        # Calculate IQR bounds
-        Q1 = group["value_clean"].quantile(0.25)
-        Q3 = group["value_clean"].quantile(0.75)
-        IQR = Q3 - Q1
+if numba is not None:
+    # No fastmath: it lets LLVM assume there are no NaNs and drop the isnan checks
+    @numba.njit(parallel=True, cache=True)
+    def _group_stats_kernel(values, codes, n_groups):
+        """Count, Q1, Q3, mean and std (ddof=1) of non-NaN values per group code"""
+        # Bucket non-NaN values by group code (counting sort, one pass)
+        bounds = np.zeros(n_groups + 1, dtype=np.int64)
+        for i in range(values.size):
+            if codes[i] >= 0 and not np.isnan(values[i]):
+                bounds[codes[i] + 1] += 1
+        bounds = np.cumsum(bounds)
+        fill = bounds[:-1].copy()
+        bucketed = np.empty(bounds[-1], dtype=np.float64)
+        for i in range(values.size):
+            if codes[i] >= 0 and not np.isnan(values[i]):
+                bucketed[fill[codes[i]]] = values[i]
+                fill[codes[i]] += 1
         
-        lower_bound = Q1 - iqr_multiplier * IQR
-        upper_bound = Q3 + iqr_multiplier * IQR
-        
-        # Store thresholds for this indicator_type
-        df.loc[group.index, "outlier_threshold_lo"] = lower_bound
-        df.loc[group.index, "outlier_threshold_hi"] = upper_bound
-        
-        # Flag outliers
-        outlier_mask = (
-            (group["value_clean"] < lower_bound) | 
-            (group["value_clean"] > upper_bound)
-        ) & group["value_clean"].notna()
-        
-        df.loc[group.index[outlier_mask], "flag_outlier"] = True
-    
-    n_outliers = df["flag_outlier"].sum()
-    print(f"✓ Flagged {n_outliers:,} outliers using IQR method")
-    
-    return df
+        # Per-group statistics in parallel
+        out = np.full((n_groups, 5), np.nan)
+        for g in numba.prange(n_groups):
+            seg = bucketed[bounds[g]:bounds[g + 1]]
+            n = seg.size
+            out[g, 0] = n
+            if n == 0:
+                continue
+            out[g, 1] = np.percentile(seg, 25.0)
+            out[g, 2] = np.percentile(seg, 75.0)
+            
+            # Welford's method, as used by pandas, so constant groups get std == 0
+            mean = 0.0
+            m2 = 0.0
+            for k in range(n):
+                delta = seg[k] - mean
+                mean += delta / (k + 1)
+                m2 += delta * (seg[k] - mean)
+            out[g, 3] = mean
+            if n > 1:
+                out[g, 4] = np.sqrt(m2 / (n - 1))
+        return out
 
 
-def compute_zscore(df: pd.DataFrame) -> pd.DataFrame:
-    """Compute z-scores for outlier analysis"""
-    df = df.copy()
-    
-    # Calculate z-score within each indicator_type
-    df["zscore"] = np.nan
+def _group_value_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-indicator_type count, quartiles, mean and std of value_clean"""
+    if numba is None:
+        grouped = df.groupby("indicator_type", observed=True)["value_clean"]
+        stats = grouped.agg(["count", "mean", "std"])
+        stats["q1"] = grouped.quantile(0.25)
+        stats["q3"] = grouped.quantile(0.75)
+        return stats
+    
+    # Categorical keys already carry integer codes; only hash plain strings
+    keys = df["indicator_type"]
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        codes, groups = keys.cat.codes.to_numpy(), keys.cat.categories
+    else:
+        codes, groups = pd.factorize(keys)
+    values = df["value_clean"].to_numpy(dtype=np.float64, na_value=np.nan)
+    
+    return pd.DataFrame(
+        _group_stats_kernel(values, codes, len(groups)),
+        index=pd.Index(groups, name="indicator_type"),
+        columns=["count", "q1", "q3", "mean", "std"]
+    )
+
+
+def flag_outliers(df: pd.DataFrame, iqr_multiplier: float = 1.5) -> pd.DataFrame:
+    """Flag outliers using IQR method and compute z-scores within each indicator_type"""
+    # One set of per-group statistics serves both the IQR bounds and z-scores
+    stats = _group_value_stats(df)
+    
+    IQR = stats["q3"] - stats["q1"]
+    has_iqr = stats["count"] >= 5  # Skip if too few values
+    has_zscore = (stats["count"] >= 3) & (stats["std"] > 0)
+    
+    group_params = np.column_stack([
+        (stats["q1"] - iqr_multiplier * IQR).where(has_iqr),
+        (stats["q3"] + iqr_multiplier * IQR).where(has_iqr),
+        stats["mean"].where(has_zscore),
+        stats["std"].where(has_zscore)
+    ])
+    
+    # Look up each row's group once; unmapped indicator_type gets position -1,
+    # which selects the all-NaN row appended at the end
+    group_params = np.vstack([group_params, np.full(4, np.nan)])
+    positions = stats.index.get_indexer(df["indicator_type"])
+    lower_bound, upper_bound, mean_val, std_val = group_params[positions].T
+    
+    values = df["value_clean"].to_numpy(dtype=np.float64, na_value=np.nan)
+    
+    # Thresholds for transparency, outlier flag (NaN values and thresholds
+    # compare as False) and z-score, assigned in one go
+    df = df.assign(
+        outlier_threshold_lo=lower_bound,
+        outlier_threshold_hi=upper_bound,
+        flag_outlier=(values < lower_bound) | (values > upper_bound),
+        zscore=(values - mean_val) / std_val
+    )
     
-    for indicator_type, group in df.groupby("indicator_type"):
-        if group["value_clean"].notna().sum() < 3:
-            continue
-        
-        mean_val = group["value_clean"].mean()
-        std_val = group["value_clean"].std()
-        
-        if std_val > 0:
-            zscores = (group["value_clean"] - mean_val) / std_val
-            df.loc[group.index, "zscore"] = zscores
+    if logger.isEnabledFor(logging.INFO):
+        n_outliers = df["flag_outlier"].sum()
+        logger.info(f"✓ Flagged {n_outliers:,} outliers using IQR method")
     
     return df
 
@@ -267,40 +386,47 @@ def compute_zscore(df: pd.DataFrame) -> pd.DataFrame:
 
 def compute_indicator_summary(df: pd.DataFrame) -> pd.DataFrame:
     """Compute indicator-level DQ summary"""
-    print("\nComputing indicator-level summary...")
+    logger.info("\nComputing indicator-level summary...")
     
-    summary = df.groupby(["indicator_type", "indicator_code", "indicator_name"]).agg(
+    summary = df.groupby(["indicator_type", "indicator_code", "indicator_name"], observed=True).agg(
         n_obs=("value_clean", "size"),
         n_missing=("flag_missing", "sum"),
         n_negative=("flag_negative", "sum"),
-        n_duplicates=("flag_duplicate", lambda x: 0),  # Already removed
         n_outliers=("flag_outlier", "sum"),
     ).reset_index()
     
+    # Duplicates were already removed (constant column, no per-group callback)
+    summary.insert(summary.columns.get_loc("n_negative") + 1, "n_duplicates", 0)
+    
     # Calculate percentages (store as decimals for Excel formatting)
     summary["pct_missing"] = summary["n_missing"] / summary["n_obs"]
     summary["pct_negative"] = summary["n_negative"] / summary["n_obs"]
     summary["pct_duplicates"] = 0.0  # Already removed
     summary["pct_outliers"] = summary["n_outliers"] / summary["n_obs"]
     
-    print(f"✓ Generated summary for {len(summary)} indicators")
+    logger.info(f"✓ Generated summary for {len(summary)} indicators")
     
     return summary
 
 
 def compute_unit_summary(df: pd.DataFrame, df_map: pd.DataFrame) -> pd.DataFrame:
     """Compute unit-level reporting completeness"""
-    print("\nComputing unit-level summary...")
+    logger.info("\nComputing unit-level summary...")
     
     # Get unique indicators
     n_indicators = df_map["indicator_type"].nunique()
     
-    # Count indicators reported per unit
-    unit_reporting = df.groupby(
-        ["country_code", "unit_code", "unit_name", "unit_level"]
-    ).agg(
-        n_indicators_reported=("indicator_type", "nunique")
-    ).reset_index()
+    # Count indicators reported per unit (dedupe once, then a fast count
+    # instead of a per-group nunique; count skips unmapped indicator_type)
+    unit_keys = ["country_code", "unit_code", "unit_name", "unit_level"]
+    unit_reporting = (
+        df[unit_keys + ["indicator_type"]]
+        .drop_duplicates()
+        .groupby(unit_keys, observed=True)["indicator_type"]
+        .count()
+        .rename("n_indicators_reported")
+        .reset_index()
+    )
     
     # Calculate completeness
     unit_reporting["n_indicators_missing"] = n_indicators - unit_reporting["n_indicators_reported"]
@@ -309,39 +435,60 @@ def compute_unit_summary(df: pd.DataFrame, df_map: pd.DataFrame) -> pd.DataFrame
     # Add duplicate count (0 after cleaning)
     unit_reporting["n_duplicates"] = 0
     
-    print(f"✓ Generated summary for {len(unit_reporting)} units")
+    logger.info(f"✓ Generated summary for {len(unit_reporting)} units")
     
     return unit_reporting
 
 
 def extract_outlier_records(df: pd.DataFrame) -> pd.DataFrame:
     """Extract flagged outlier records for review"""
-    print("\nExtracting outlier records...")
+    logger.info("\nExtracting outlier records...")
     
     df_outliers = df[df["flag_outlier"]].copy()
     
+    # Precompute |zscore| so the dashboard can sort without a key function
+    df_outliers["abs_zscore"] = df_outliers["zscore"].abs()
+    
     # Select relevant columns (including thresholds for transparency)
     outlier_cols = [
         "country_code", "unit_code", "unit_name", "unit_level",
         "indicator_code", "indicator_name", "indicator_type",
-        "date", "value_clean", "zscore",
+        "date", "value_clean", "zscore", "abs_zscore",
         "outlier_threshold_lo", "outlier_threshold_hi"
     ]
     
-    df_outliers = df_outliers[outlier_cols].copy()
+    # Most severe outliers first
+    df_outliers = df_outliers[outlier_cols].sort_values("abs_zscore", ascending=False)
     
-    print(f"✓ Extracted {len(df_outliers):,} outlier records")
+    logger.info(f"✓ Extracted {len(df_outliers):,} outlier records")
     
     return df_outliers
 
 
+def compute_unit_outlier_pivot(df_outliers: pd.DataFrame) -> pd.DataFrame:
+    """Count outliers per unit (rows) and indicator_type (columns) for the dashboard"""
+    logger.info("\nComputing unit outlier counts...")
+    
+    pivot = (
+        df_outliers.groupby(["unit_code", "indicator_type"], observed=True)
+        .size()
+        .unstack("indicator_type", fill_value=0)
+    )
+    pivot.columns.name = None
+    pivot = pivot.reset_index()
+    
+    logger.info(f"✓ Counted outliers for {len(pivot)} units across {pivot.shape[1] - 1} indicator types")
+    
+    return pivot
+
+
 # ============================================================
 # DERIVED INDICATORS
 # ============================================================
 
 def compute_derived_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """Compute percentage-based derived indicators"""
-    print("\nComputing derived indicators...")
+    logger.info("\nComputing derived indicators...")
     
     # Define derived indicator formulas (expanded list)
     derived_formulas = {
@@ -370,28 +517,57 @@ def compute_derived_indicators(df: pd.DataFrame) -> pd.DataFrame:
         "pct_hiv_testing_ld": ("HIV testing at L&D", "delivery"),
     }
     
-    # Pivot to wide format
-    df_wide = df.pivot_table(
-        index=["country_code", "unit_code", "unit_name", "unit_level", "date"],
-        columns="indicator_type",
-        values="value_clean",
-        aggfunc="first"
-    ).reset_index()
+    # Pivot to wide format, keeping only indicators referenced by the formulas
+    # (groupby().first().unstack() is much cheaper than pivot_table). Dropping
+    # NaN values first matches pivot_table's dropna: no all-NaN rows or columns
+    needed = {col for pair in derived_formulas.values() for col in pair}
+    values_long = (
+        df[df["indicator_type"].isin(needed) & df["value_clean"].notna()]
+        .groupby(["country_code", "unit_code", "unit_name", "unit_level", "date", "indicator_type"], observed=True)
+        ["value_clean"]
+        .first()
+    )
     
-    # Compute derived indicators
-    indicators_computed = 0
-    for derived_name, (numerator, denominator) in derived_formulas.items():
-        if numerator in df_wide.columns and denominator in df_wide.columns:
-            # Calculate as decimal (0-1) for Excel percentage formatting
-            df_wide[derived_name] = (
-                df_wide[numerator] / df_wide[denominator].replace(0, np.nan)
-            )
-            
-            # Cap at 100% (1.0 in decimal form)
-            df_wide[derived_name] = df_wide[derived_name].clip(upper=1.0)
-            indicators_computed += 1
+    # Plain string indicator_type labels, so the wide frame gets ordinary
+    # columns that new derived columns can be added to
+    values_long.index = values_long.index.remove_unused_levels()
+    values_long.index = values_long.index.set_levels(
+        values_long.index.levels[-1].astype(str), level="indicator_type"
+    )
+    df_wide = values_long.unstack("indicator_type").reset_index()
     
-    print(f"✓ Computed {indicators_computed} derived indicators (from {len(derived_formulas)} formulas)")
+    # Keep formulas whose numerator and denominator were both reported
+    available = {
+        derived_name: (numerator, denominator)
+        for derived_name, (numerator, denominator) in derived_formulas.items()
+        if numerator in df_wide.columns and denominator in df_wide.columns
+    }
+    computed_names = list(available)
+    
+    # Compute all derived indicators in one 2D division
+    # (as decimal 0-1 for Excel percentage formatting; zero denominators -> NaN).
+    # Shared denominators (e.g. anc1, delivery) are read and masked only once
+    num = df_wide[[numerator for numerator, _ in available.values()]].to_numpy(dtype=np.float64)
+    den_codes, den_names = pd.factorize(pd.Index([denominator for _, denominator in available.values()]))
+    den = df_wide[list(den_names)].to_numpy(dtype=np.float64)
+    den[den == 0] = np.nan
+    ratios = num / den[:, den_codes]
+    
+    # Cap at 100% (1.0 in decimal form)
+    np.minimum(ratios, 1.0, out=ratios)
+    df_wide[computed_names] = ratios
+    
+    # 3-month moving average per unit for the dashboard trend view
+    # (rows are already ordered by unit and date from the groupby)
+    df_wide = df_wide.join(
+        df_wide.groupby("unit_code", observed=True)[computed_names]
+        .rolling(3, min_periods=1)
+        .mean()
+        .reset_index(level=0, drop=True)
+        .add_suffix("_ma3")
+    )
+    
+    logger.info(f"✓ Computed {len(computed_names)} derived indicators (from {len(derived_formulas)} formulas)")
     
     return df_wide
 
@@ -402,7 +578,7 @@ def compute_derived_indicators(df: pd.DataFrame) -> pd.DataFrame:
 
 def load_unit_geometry(engine, config: PipelineConfig) -> pd.DataFrame:
     """Load unit geometry from database"""
-    print("\nLoading unit geometry...")
+    logger.info("\nLoading unit geometry...")
     
     query = """
     SELECT DISTINCT
@@ -417,40 +593,158 @@ def load_unit_geometry(engine, config: PipelineConfig) -> pd.DataFrame:
       AND unit_geometry IS NOT NULL
     """
     
-    df_geo = pd.read_sql(
-        query,
-        con=engine,
-        params={
-            "country_code": config.COUNTRY_CODE,
-            "unit_level": config.UNIT_LEVEL
-        }
-    )
+    # Stream through a server-side cursor like load_raw_data; WKT text is
+    # large, so the result set is never buffered whole by the DB driver
+    with engine.connect().execution_options(stream_results=True) as conn:
+        chunks = pd.read_sql(
+            query,
+            con=conn,
+            params={
+                "country_code": config.COUNTRY_CODE,
+                "unit_level": config.UNIT_LEVEL
+            },
+            chunksize=config.SQL_CHUNKSIZE,
+            dtype={"unit_level": "int16"}
+        )
+        df_geo = pd.concat(chunks, ignore_index=True)
     
-    print(f"✓ Loaded geometry for {len(df_geo)} units")
+    logger.info(f"✓ Loaded geometry for {len(df_geo)} units")
     
     return df_geo
 
 
 def compute_centroids(df_geo: pd.DataFrame) -> pd.DataFrame:
     """Compute lat/lon centroids from WKT geometry"""
-    print("Computing centroids...")
+    logger.info("Computing centroids...")
+    
+    # Parse WKT and extract centroids with vectorized shapely ufuncs
+    # (bulk GEOS calls over the whole array, no GeoDataFrame round-trip)
+    geometries = shapely.from_wkt(df_geo["unit_geometry"].to_numpy())
+    centroids = shapely.centroid(geometries)
+    centroids[shapely.is_empty(centroids)] = None  # Empty geometry -> NaN coordinates
+    
+    # Keep identifiers and coordinates, assembled from the existing arrays
+    # (dropna makes the only copy)
+    id_cols = ["country_code", "unit_code", "unit_name", "unit_level"]
+    df_coords = pd.DataFrame(
+        {
+            **{col: df_geo[col].to_numpy() for col in id_cols},
+            "lat": shapely.get_y(centroids),
+            "lon": shapely.get_x(centroids)
+        },
+        copy=False
+    ).dropna(subset=["lat", "lon"])
+    
+    logger.info(f"✓ Computed centroids for {len(df_coords)} units")
+    
+    return df_coords
+
+
+def load_unit_centroids_postgis(engine, config: PipelineConfig) -> pd.DataFrame:
+    """Load lat/lon centroids computed by PostGIS (no WKT transfer or parsing)"""
+    logger.info("\nLoading unit centroids from PostGIS...")
     
-    # Convert to GeoDataFrame
-    gdf = gpd.GeoDataFrame(
-        df_geo,
-        geometry=gpd.GeoSeries.from_wkt(df_geo["unit_geometry"]),
-        crs="EPSG:4326"
+    # DISTINCT first so each unit's geometry is parsed and reduced only once
+    query = """
+    WITH units AS (
+        SELECT DISTINCT
+            country_code,
+            unit_code,
+            unit_name,
+            unit_level,
+            unit_geometry
+        FROM observation
+        WHERE country_code = %(country_code)s
+          AND unit_level = %(unit_level)s
+          AND unit_geometry IS NOT NULL
+    ),
+    centroids AS (
+        SELECT
+            country_code,
+            unit_code,
+            unit_name,
+            unit_level,
+            ST_Centroid(unit_geometry::geometry) AS centroid
+        FROM units
     )
+    SELECT
+        country_code,
+        unit_code,
+        unit_name,
+        unit_level,
+        ST_Y(centroid) AS lat,
+        ST_X(centroid) AS lon
+    FROM centroids
+    """
     
-    # Extract centroids
-    gdf["lon"] = gdf.geometry.centroid.x
-    gdf["lat"] = gdf.geometry.centroid.y
+    df_coords = pd.read_sql(
+        query,
+        con=engine,
+        params={
+            "country_code": config.COUNTRY_CODE,
+            "unit_level": config.UNIT_LEVEL
+        },
+        dtype={"unit_level": "int16", "lat": "float64", "lon": "float64"}
+    )
     
-    # Convert back to regular DataFrame
-    df_coords = gdf[["country_code", "unit_code", "unit_name", "unit_level", "lat", "lon"]].copy()
+    # Empty geometries have no centroid coordinates (NULL from ST_X/ST_Y)
     df_coords = df_coords.dropna(subset=["lat", "lon"])
     
-    print(f"✓ Computed centroids for {len(df_coords)} units")
+    logger.info(f"✓ Loaded centroids for {len(df_coords)} units")
+    
+    return df_coords
+
+
+def load_unit_centroids(engine, config: PipelineConfig, unit_codes: pd.Series) -> pd.DataFrame:
+    """Load centroids for unit_codes from the local cache, or from the database and cache them"""
+    cache_path = config.geo_cache_path()
+    requested = pd.unique(unit_codes.to_numpy(dtype=object))
+    
+    if cache_path.exists() and not config.FORCE_REFRESH:
+        cache_age_days = (time.time() - cache_path.stat().st_mtime) / 86400
+        if cache_age_days <= config.GEO_CACHE_MAX_AGE_DAYS:
+            df_cached = pd.read_parquet(cache_path)
+            
+            # Units that appeared after the cache was written need a reload
+            n_new_units = (~pd.Index(requested).isin(df_cached["unit_code"])).sum()
+            if n_new_units == 0:
+                df_coords = df_cached.dropna(subset=["lat", "lon"])
+                logger.info(f"\n✓ Loaded cached centroids for {len(df_coords)} units: {cache_path}")
+                return df_coords
+            logger.info(f"\nCentroid cache is missing {n_new_units} units, reloading: {cache_path}")
+    
+    if config.CENTROIDS_IN_DB:
+        df_coords = load_unit_centroids_postgis(engine, config)
+    else:
+        df_geo = load_unit_geometry(engine, config)
+        df_coords = compute_centroids(df_geo)
+    
+    # Cache centroids for subsequent runs (skips SQL geometry fetch and WKT parsing).
+    # Requested units without geometry are cached with empty coordinates, so
+    # they do not count as new units and force a reload on every run
+    no_geometry = requested[~pd.Index(requested).isin(df_coords["unit_code"])]
+    df_cache = pd.concat([
+        df_coords,
+        pd.DataFrame({
+            "country_code": config.COUNTRY_CODE,
+            "unit_code": no_geometry,
+            "unit_level": np.full(len(no_geometry), config.UNIT_LEVEL, dtype=np.int16)
+        })
+    ], ignore_index=True)
+    df_cache.to_parquet(cache_path, index=False)
+    logger.info(f"✓ Cached centroids: {cache_path}")
+    
+    return df_coords
+    
+    if config.CENTROIDS_IN_DB:
+        df_coords = load_unit_centroids_postgis(engine, config)
+    else:
+        df_geo = load_unit_geometry(engine, config)
+        df_coords = compute_centroids(df_geo)
+    
+    # Cache centroids for subsequent runs (skips SQL geometry fetch and WKT parsing)
+    df_coords.to_parquet(cache_path, index=False)
+    logger.info(f"✓ Cached centroids: {cache_path}")
     
     return df_coords
 
@@ -462,174 +756,330 @@ def create_geo_dq_file(
     output_path: str
 ):
     """Create geo-enabled DQ file for Streamlit map"""
-    print("\nCreating geo-enabled DQ file...")
+    logger.info("\nCreating geo-enabled DQ file...")
     
-    # Count outliers per unit
+    # Count outliers per unit (Arrow hash aggregation)
     outlier_counts = (
-        df_outliers.groupby("unit_code")
-        .size()
-        .rename("n_outliers_unit")
-        .reset_index()
+        pa.Table.from_pandas(df_outliers[["unit_code"]], preserve_index=False)
+        .group_by("unit_code")
+        .aggregate([([], "count_all")])
+        .to_pandas()
+        .rename(columns={"count_all": "n_outliers_unit"})
     )
     
-    # Merge: dq_unit + outlier counts + coordinates
-    df_geo_dq = dq_unit.merge(
-        outlier_counts,
-        on="unit_code",
-        how="left"
-    ).merge(
-        df_coords[["unit_code", "lat", "lon"]],
-        on="unit_code",
-        how="left"
+    # Give every unit_code key the same dtype as dq_unit, so lookups on
+    # categorical keys match on integer codes
+    unit_code_dtype = dq_unit["unit_code"].dtype
+    outlier_counts = outlier_counts.astype({"unit_code": unit_code_dtype}).set_index("unit_code")
+    coords = df_coords[["unit_code", "lat", "lon"]].astype({"unit_code": unit_code_dtype}).set_index("unit_code")
+    
+    # Join coordinates on the unit_code index
+    df_geo_dq = dq_unit.set_index("unit_code").join(coords, how="left").reset_index()
+    df_geo_dq = df_geo_dq[list(dq_unit.columns) + ["lat", "lon"]]
+    
+    # Outlier counts per unit, built directly as int32 (0 for units without outliers)
+    n_outliers_unit = (
+        outlier_counts["n_outliers_unit"]
+        .reindex(df_geo_dq["unit_code"].to_numpy(), fill_value=0)
+        .to_numpy(dtype=np.int32)
     )
+    df_geo_dq.insert(len(dq_unit.columns), "n_outliers_unit", n_outliers_unit)
     
-    # Fill missing outlier counts
-    df_geo_dq["n_outliers_unit"] = df_geo_dq["n_outliers_unit"].fillna(0).astype(int)
+    # Bubble size for the unfiltered dashboard map (same square-root scaling)
+    df_geo_dq["bubble_size_default"] = np.sqrt(df_geo_dq["n_outliers_unit"] + 1) * 5
     
     # Drop units without coordinates
     df_geo_dq = df_geo_dq.dropna(subset=["lat", "lon"])
     
-    # Save as parquet
-    df_geo_dq.to_parquet(output_path, index=False)
+    # Save as parquet: dictionary-encode the repeated unit identifiers and
+    # byte-split the coordinates, which compress poorly as plain doubles
+    df_geo_dq.to_parquet(
+        output_path,
+        index=False,
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=["country_code", "unit_code", "unit_name", "unit_level"],
+        column_encoding={"lat": "BYTE_STREAM_SPLIT", "lon": "BYTE_STREAM_SPLIT"}
+    )
     
-    print(f"✓ Saved geo DQ file: {output_path}")
-    print(f"  {len(df_geo_dq)} units with coordinates")
+    logger.info(f"✓ Saved geo DQ file: {output_path}")
+    logger.info(f"  {len(df_geo_dq)} units with coordinates")
 
 
 # ============================================================
 # EXCEL EXPORT
 # ============================================================
 
+def summarize_by_indicator(df: pd.DataFrame, count_name: str) -> pd.DataFrame:
+    """Count records and affected units per indicator_type for the Excel workbook"""
+    # dropna=False keeps records without an indicator_type mapping in the counts
+    summary = (
+        df.groupby("indicator_type", observed=True, dropna=False)
+        .agg(**{count_name: ("unit_code", "size"), "n_units": ("unit_code", "nunique")})
+        .reset_index()
+        .sort_values(count_name, ascending=False)
+    )
+    summary["indicator_type"] = summary["indicator_type"].astype(object).fillna("unmapped")
+    return summary
+
+
+def _contiguous_runs(indices: List[int]) -> List[Tuple[int, int]]:
+    """Collapse sorted column indices into (first, last) runs of adjacent columns"""
+    runs = []
+    for idx in indices:
+        if runs and idx == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], idx)
+        else:
+            runs.append((idx, idx))
+    return runs
+
+
 def export_excel_workbook(
     dq_indicator: pd.DataFrame,
     dq_unit: pd.DataFrame,
     df_duplicates: pd.DataFrame,
     df_outliers: pd.DataFrame,
     df_derived: pd.DataFrame,
-    output_path: str
+    output_path: str,
+    width_sample_rows: int = 1000,
+    top_n_outliers: int = 1000,
+    row_block_size: int = 50_000
 ):
-    """Export formatted Excel workbook with all DQ tables"""
-    print(f"\nExporting Excel workbook: {output_path}")
+    """Export formatted Excel workbook with all DQ tables
+
+    Duplicates and outliers can run to millions of rows, so the workbook
+    only carries per-indicator summaries plus the most severe outliers; the
+    full tables are written by export_parquet_tables
+    (``<workbook>_duplicates.parquet`` / ``<workbook>_outliers.parquet``).
+
+    Written in xlsxwriter constant_memory mode, which flushes each row to
+    disk as soon as the next one starts. That requires strict row-order
+    writes, so every sheet is written row by row via write_row rather than
+    through DataFrame.to_excel (which writes column by column).
+    """
+    logger.info(f"\nExporting Excel workbook: {output_path}")
+    
+    workbook = xlsxwriter.Workbook(output_path, {
+        "constant_memory": True,
+        "default_date_format": "YYYY-MM-DD",
+        "strings_to_numbers": False,
+        "strings_to_formulas": False,
+        "strings_to_urls": False
+    })
     
-    # Create Excel writer with XlsxWriter engine
-    with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
-        workbook = writer.book
-        
-        # Define formats
-        header_fmt = workbook.add_format({
-            "bold": True,
-            "bg_color": "#4472C4",
-            "font_color": "white",
-            "border": 1
-        })
-        
-        percent_fmt = workbook.add_format({"num_format": "0.00%"})
-        
-        # Write each sheet
-        sheets = {
-            "completeness_indicator": dq_indicator,
-            "completeness_unit": dq_unit,
-            "duplicates": df_duplicates,
-            "outliers": df_outliers,
-            "derived_indicators": df_derived
-        }
-        
+    # Define formats
+    header_fmt = workbook.add_format({
+        "bold": True,
+        "bg_color": "#4472C4",
+        "font_color": "white",
+        "border": 1
+    })
+    
+    percent_fmt = workbook.add_format({"num_format": "0.00%"})
+    
+    # Write each sheet
+    sheets = {
+        "completeness_indicator": dq_indicator,
+        "completeness_unit": dq_unit,
+        "duplicates_summary": summarize_by_indicator(df_duplicates, "n_duplicates"),
+        "outliers_summary": summarize_by_indicator(df_outliers, "n_outliers"),
+        "outliers_top": df_outliers.head(top_n_outliers),
+        "derived_indicators": df_derived
+    }
+    
+    try:
         for sheet_name, df in sheets.items():
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            worksheet = writer.sheets[sheet_name]
-            
-            # Format header
-            for col_num, value in enumerate(df.columns.values):
-                worksheet.write(0, col_num, value, header_fmt)
+            worksheet = workbook.add_worksheet(sheet_name)
             
-            # Auto-width columns
+            # Column widths from a sample of rows; formats must be set
+            # before any cells are written in constant_memory mode
+            pct_cols = [i for i, c in enumerate(df.columns) if str(c).startswith("pct_")]
+            sample = df.head(width_sample_rows)
             for i, col in enumerate(df.columns):
-                max_len = max(
-                    df[col].astype(str).map(len).max(),
-                    len(str(col))
-                ) + 2
+                if i in pct_cols:
+                    continue
+                sample_len = sample[col].astype(str).str.len().max() if len(sample) else 0
+                max_len = max(sample_len, len(str(col))) + 2
                 worksheet.set_column(i, i, min(max_len, 40))
             
+            # Format percentage columns, one range per run of adjacent columns
+            for first_col, last_col in _contiguous_runs(pct_cols):
+                worksheet.set_column(first_col, last_col, 12, percent_fmt)
+            
             # Freeze header
             worksheet.freeze_panes(1, 0)
             
-            # Format percentage columns
-            pct_cols = [i for i, c in enumerate(df.columns) if c.startswith("pct_")]
-            for col_idx in pct_cols:
-                worksheet.set_column(col_idx, col_idx, 12, percent_fmt)
+            # Header row
+            worksheet.write_row(0, 0, [str(c) for c in df.columns], header_fmt)
+            
+            # Data rows (NaN/NaT written as blank cells), converted to Python
+            # objects one block at a time so only a block is ever held twice
+            for start in range(0, len(df), row_block_size):
+                block = df.iloc[start:start + row_block_size]
+                values = block.astype(object).where(block.notna(), None)
+                for row_num, row in enumerate(values.itertuples(index=False, name=None), start=start + 1):
+                    worksheet.write_row(row_num, 0, row)
+    finally:
+        workbook.close()
+    
+    logger.info(f"✓ Excel workbook exported successfully")
+    logger.info(f"  Sheets: {list(sheets.keys())}")
+
+
+def export_parquet_tables(
+    dq_indicator: pd.DataFrame,
+    dq_unit: pd.DataFrame,
+    df_duplicates: pd.DataFrame,
+    df_outliers: pd.DataFrame,
+    df_derived: pd.DataFrame,
+    unit_outlier_pivot: pd.DataFrame,
+    output_prefix: str
+):
+    """Export each DQ table as a parquet file for fast dashboard loading
+
+    These are the only complete copies of the duplicates and outliers
+    tables; the Excel workbook carries summaries of them.
+    """
+    logger.info(f"\nExporting parquet tables: {output_prefix}_*.parquet")
+    
+    tables = {
+        "completeness_indicator": dq_indicator,
+        "completeness_unit": dq_unit,
+        "duplicates": df_duplicates,
+        "outliers": df_outliers,
+        "derived_indicators": df_derived,
+        "unit_outlier_pivot": unit_outlier_pivot
+    }
+    
+    for table_name, df in tables.items():
+        df.to_parquet(f"{output_prefix}_{table_name}.parquet", index=False, compression="zstd")
     
-    print(f"✓ Excel workbook exported successfully")
-    print(f"  Sheets: {list(sheets.keys())}")
+    logger.info(f"✓ Parquet tables exported successfully")
+    logger.info(f"  Tables: {list(tables.keys())}")
+
+
+# ============================================================
+# STEP CACHE
+# ============================================================
+
+def load_step_cache(config: PipelineConfig, steps: List[str]) -> List[pd.DataFrame] | None:
+    """Load snapshots for the given steps, or None if caching is off or any is missing"""
+    if not config.USE_STEP_CACHE or config.FORCE_REFRESH:
+        return None
+    
+    paths = [config.step_cache_path(step) for step in steps]
+    if not all(path.exists() for path in paths):
+        return None
+    
+    frames = [pd.read_parquet(path) for path in paths]
+    logger.info(f"✓ Loaded cached {', '.join(steps)}: {config.CACHE_DIR}/")
+    return frames
+
+
+def save_step_cache(config: PipelineConfig, frames: Dict[str, pd.DataFrame]):
+    """Write step snapshots for later reruns (no-op unless step caching is on)"""
+    if not config.USE_STEP_CACHE:
+        return
+    
+    config.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for step, df in frames.items():
+        df.to_parquet(config.step_cache_path(step), index=False)
 
 
 # ============================================================
 # MAIN PIPELINE
 # ============================================================
 
+def configure_logging(level: int = logging.INFO):
+    """Send progress messages to stdout, buffered and flushed at step boundaries"""
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    # Warnings and errors flush the buffer immediately
+    buffer_handler = MemoryHandler(capacity=1000, flushLevel=logging.WARNING, target=stream_handler)
+    
+    logger.handlers = [buffer_handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def flush_logs():
+    """Write out progress messages held in the log buffer"""
+    for handler in logger.handlers:
+        handler.flush()
+
+
+def log_step(title: str):
+    """Log the next step header and flush, so it shows before the step starts running"""
+    logger.info("\n" + "="*60)
+    logger.info(title)
+    logger.info("-" * 60)
+    flush_logs()
+
+
 def main():
     """Execute the complete data quality pipeline"""
     
-    print("="*60)
-    print("AHEAD INTEGRATED DATA QUALITY PIPELINE")
-    print("="*60)
-    print()
+    configure_logging()
+    
+    logger.info("="*60)
+    logger.info("AHEAD INTEGRATED DATA QUALITY PIPELINE")
+    logger.info("="*60)
+    logger.info("")
     
     try:
         # 1. Setup
-        print("STEP 1: Configuration & Setup")
-        print("-" * 60)
+        logger.info("STEP 1: Configuration & Setup")
+        logger.info("-" * 60)
+        flush_logs()
         load_environment()  # CRITICAL FIX: Load .env BEFORE config validation
         config = PipelineConfig()
         config.validate()
         engine = create_db_engine()
         
         # 2. Load Data
-        print("\n" + "="*60)
-        print("STEP 2: Data Loading")
-        print("-" * 60)
+        log_step("STEP 2: Data Loading")
         df_map = load_indicator_mapping(config.MAP_PATH)
-        df_raw = load_raw_data(engine, config, df_map)
+        cached = load_step_cache(config, ["raw"])
+        if cached:
+            df_raw, = cached
+        else:
+            df_raw = load_raw_data(engine, config, df_map)
+            save_step_cache(config, {"raw": df_raw})
         
         # 3. Quality Checks
-        print("\n" + "="*60)
-        print("STEP 3: Data Quality Checks")
-        print("-" * 60)
-        df = flag_missing_values(df_raw)
-        df = flag_negative_values(df)
-        df, df_duplicates = remove_duplicates(df)
-        df = flag_outliers_iqr(df, config.IQR_MULTIPLIER)
-        df = compute_zscore(df)
+        log_step("STEP 3: Data Quality Checks")
+        cached = load_step_cache(config, ["checked", "duplicates"])
+        if cached:
+            df, df_duplicates = cached
+        else:
+            df = flag_missing_and_negative(df_raw)
+            df, df_duplicates = remove_duplicates(df)
+            df = flag_outliers(df, config.IQR_MULTIPLIER)
+            save_step_cache(config, {"checked": df, "duplicates": df_duplicates})
         
         # 4. DQ Summaries
-        print("\n" + "="*60)
-        print("STEP 4: Summary Tables")
-        print("-" * 60)
+        log_step("STEP 4: Summary Tables")
         dq_indicator = compute_indicator_summary(df)
         dq_unit = compute_unit_summary(df, df_map)
         df_outliers = extract_outlier_records(df)
+        unit_outlier_pivot = compute_unit_outlier_pivot(df_outliers)
         
         # 5. Derived Indicators
-        print("\n" + "="*60)
-        print("STEP 5: Derived Indicators")
-        print("-" * 60)
+        log_step("STEP 5: Derived Indicators")
         df_derived = compute_derived_indicators(df)
         
         # 6. Geo Data
-        print("\n" + "="*60)
-        print("STEP 6: Geographic Data")
-        print("-" * 60)
+        log_step("STEP 6: Geographic Data")
         try:
-            df_geo = load_unit_geometry(engine, config)
-            df_coords = compute_centroids(df_geo)
+            df_coords = load_unit_centroids(engine, config, dq_unit["unit_code"])
             create_geo_dq_file(dq_unit, df_outliers, df_coords, config.DQ_GEO_PATH)
         except Exception as e:
-            print(f"⚠ Warning: Could not create geo file: {e}")
-            print("  Continuing without geographic data...")
+            logger.warning(f"⚠ Warning: Could not create geo file: {e}")
+            logger.warning("  Continuing without geographic data...")
         
         # 7. Export
-        print("\n" + "="*60)
-        print("STEP 7: Export Outputs")
-        print("-" * 60)
+        log_step("STEP 7: Export Outputs")
         export_excel_workbook(
             dq_indicator,
             dq_unit,
@@ -638,28 +1088,38 @@ def main():
             df_derived,
             config.DQ_EXCEL_PATH
         )
+        export_parquet_tables(
+            dq_indicator,
+            dq_unit,
+            df_duplicates,
+            df_outliers,
+            df_derived,
+            unit_outlier_pivot,
+            config.DQ_PARQUET_PREFIX
+        )
         
         # Success
-        print("\n" + "="*60)
-        print("✓ PIPELINE COMPLETED SUCCESSFULLY")
-        print("="*60)
-        print(f"\nOutputs generated:")
-        print(f"  1. {config.DQ_EXCEL_PATH}")
+        logger.info("\n" + "="*60)
+        logger.info("✓ PIPELINE COMPLETED SUCCESSFULLY")
+        logger.info("="*60)
+        logger.info(f"\nOutputs generated:")
+        logger.info(f"  1. {config.DQ_EXCEL_PATH}")
+        logger.info(f"  2. {config.DQ_PARQUET_PREFIX}_*.parquet")
         if Path(config.DQ_GEO_PATH).exists():
-            print(f"  2. {config.DQ_GEO_PATH}")
-        print(f"\nNext steps:")
-        print(f"  1. Review Excel workbook for DQ issues")
-        print(f"  2. Launch Streamlit dashboard: streamlit run dq_dashboard_app.py")
-        print()
+            logger.info(f"  3. {config.DQ_GEO_PATH}")
+        logger.info(f"\nNext steps:")
+        logger.info(f"  1. Review Excel workbook for DQ issues")
+        logger.info(f"  2. Launch Streamlit dashboard: streamlit run dq_dashboard_app.py")
+        logger.info("")
+        flush_logs()
         
     except Exception as e:
-        print("\n" + "="*60)
-        print("❌ PIPELINE FAILED")
-        print("="*60)
-        print(f"\nError: {e}")
-        print(f"\nFull traceback:")
-        import traceback
-        traceback.print_exc()
+        logger.error("\n" + "="*60)
+        logger.error("❌ PIPELINE FAILED")
+        logger.error("="*60)
+        logger.error(f"\nError: {e}")
+        logger.exception(f"\nFull traceback:")
+        flush_logs()
         sys.exit(1)
 
 